@@ -248,6 +248,7 @@ class casadiTestCase(unittest.TestCase):
   def assertAlmostEqual(self,first, second, places=7, msg=""):
       if isnan(first ) and isnan(second): return
       msg+= " %.16e <-> %.16e"  % (first, second)
+      # Scaling is mirrored in the checkarray fast path; keep in sync
       n =  max(abs(first),abs(second))
       if n>1e3:
         n = 10**floor(log10(n))
@@ -287,6 +288,24 @@ class casadiTestCase(unittest.TestCase):
       self.assertEqual(zt.shape[0],zr.shape[0],"In %s: %s dimension error. Got %s, expected %s. %s <-> %s" % (name,failmessage,str(zt.shape),str(zr.shape),str(zt),str(zr)))
       self.assertEqual(len(zt.shape),len(zr.shape),"In %s: %s dimension error. Got %s, expected %s. %s <-> %s" % (name,failmessage,str(zt.shape),str(zr.shape),str(zt),str(zr)))
       self.assertEqual(zt.shape[1],zr.shape[1],"In %s: %s dimension error. Got %s, expected %s. %s <-> %s" % (name,failmessage,str(zt.shape),str(zr.shape),str(zt),str(zr)))
+
+      # Vectorized fast path for numeric data; stricter than assertAlmostEqual,
+      # anything it does not accept is handled by the element-wise loop below
+      try:
+        nt = numpy.array(zt)
+        nr = numpy.array(zr)
+      except:
+        nt = nr = None
+      if nt is not None and nt.dtype.kind in 'biuf' and nr.dtype.kind in 'biuf' and nt.ndim==2 and nt.shape==nr.shape:
+        nt = nt.astype(float)
+        nr = nr.astype(float)
+        with numpy.errstate(all='ignore'):
+          # Same scaling as casadiTestCase.assertAlmostEqual; keep in sync
+          n = numpy.maximum(abs(nt),abs(nr))
+          n = numpy.where(n>1e3,10**numpy.floor(numpy.log10(n)),1.0)
+          ok = (nt==nr) | (numpy.isnan(nt) & numpy.isnan(nr)) | (abs(nt/n-nr/n)<=0.25*10**(-digits))
+        if numpy.all(ok): return
+
       for i in range(zr.shape[0]):
         for j in range(zr.shape[1]):
           try:
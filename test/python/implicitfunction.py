@@ -29,20 +29,13 @@ from types import *
 from helpers import *
 
 solvers= []
-try:
-  load_rootfinder("kinsol")
+if has_rootfinder("kinsol"):
   solvers.append(("kinsol",{"abstol":1e-10},[]))
-except:
-  pass
-try:
-  load_nlpsol("ipopt")
+
+if has_nlpsol("ipopt"):
   solvers.append(("nlpsol",{"nlpsol": "ipopt","nlpsol_options":{"print_time": False,"ipopt": {"print_level": 0}}},[]))
-except:
-  pass
-try:
-  solvers.append(("newton",{},[]))
-except:
-  pass
+
+solvers.append(("newton",{},[]))
 
 solvers.append(("fast_newton",{},("codegen")))
 
@@ -52,50 +45,49 @@ class ImplicitFunctiontests(casadiTestCase):
 
   @memory_heavy()
   def test_linear(self):
+    x=SX.sym("x",2)
+    A_ = DM([[1,2],[3,2.1]])
+    C_ = DM([[1.6,2.1],[1,1.3]])
+    b_ = DM([0.7,0.6])
+    f_num=Function("f", [x],[mtimes(A_,x)-b_, mtimes(C_,x)])
+    sol_num = solve(A_,b_)
+    refsol_num = Function("refsol", [x],[sol_num, mtimes(C_,sol_num)])
+
+    A = SX.sym("A",2,2)
+    b = SX.sym("b",2)
+    f_sym=Function("f", [x,A,b],[mtimes(A,x)-b])
+    sol_sym = solve(A,b)
+    refsol_sym = Function("refsol", [x,A,b],[sol_sym])
+
+    f_ext=Function("f", [x,A,b],[mtimes(A,x)-b,mtimes(C_,x)])
+    refsol_ext = Function("refsol", [x,A,b],[sol_sym,mtimes(C_,sol_sym)])
+
+    solver_in = [0]*3
+    solver_in[1]=A_
+    solver_in[2]=b_
+
     for Solver, options, features in solvers:
       self.message(Solver)
-      x=SX.sym("x",2)
-      A_ = DM([[1,2],[3,2.1]])
-      C_ = DM([[1.6,2.1],[1,1.3]])
-      b_ = DM([0.7,0.6])
-      f=Function("f", [x],[mtimes(A_,x)-b_, mtimes(C_,x)])
-      solver=rootfinder("solver", Solver, f, options)
+      solver=rootfinder("solver", Solver, f_num, options)
       solver_out = solver(0)
 
-      refsol = Function("refsol", [x],[solve(A_,b_), mtimes(C_,solve(A_,b_))])
-      self.checkfunction(solver,refsol,inputs=[0],digits=10)
+      self.checkfunction(solver,refsol_num,inputs=[0],digits=10)
       if "newton" in Solver: self.check_serialize(solver,inputs=[0])
       if "codegen" in features: self.check_codegen(solver,inputs=[0])
 
-      A = SX.sym("A",2,2)
-      b = SX.sym("b",2)
-      f=Function("f", [x,A,b],[mtimes(A,x)-b])
-      solver=rootfinder("solver", Solver, f, options)
-      solver_in = [0]*3
-      solver_in[1]=A_
-      solver_in[2]=b_
+      solver=rootfinder("solver", Solver, f_sym, options)
 
-      refsol = Function("refsol", [x,A,b],[solve(A,b)])
-      self.checkfunction(solver,refsol,inputs=solver_in,digits=10)
+      self.checkfunction(solver,refsol_sym,inputs=solver_in,digits=10)
       if "newton" in Solver: self.check_serialize(solver,inputs=solver_in)
       if "codegen" in features: self.check_codegen(solver,inputs=solver_in)
 
-      A = SX.sym("A",2,2)
-      b = SX.sym("b",2)
-      f=Function("f", [x,A,b],[mtimes(A,x)-b,mtimes(C_,x)])
       for ad_weight_sp in [0,1]:
         for ad_weight in [0,1]:
           print(ad_weight, ad_weight_sp)
-          options2 = dict(options)
-          options2["ad_weight_sp"] = ad_weight_sp
-          options2["ad_weight"] = ad_weight
-          solver=rootfinder("solver", Solver, f, options2)
-          solver_in = [0]*3
-          solver_in[1]=A_
-          solver_in[2]=b_
-
-          refsol = Function("refsol", [x,A,b],[solve(A,b),mtimes(C_,solve(A,b))])
-          self.checkfunction(solver,refsol,inputs=solver_in,digits=10)
+          options2 = dict(options, ad_weight_sp=ad_weight_sp, ad_weight=ad_weight)
+          solver=rootfinder("solver", Solver, f_ext, options2)
+
+          self.checkfunction(solver,refsol_ext,inputs=solver_in,digits=10)
           if "newton" in Solver: self.check_serialize(solver,inputs=solver_in)
       if "codegen" in features: self.check_codegen(solver,inputs=solver_in)
 
@@ -130,7 +122,7 @@ class ImplicitFunctiontests(casadiTestCase):
       n=0.2
       f=Function("f", [y,x], [x-arcsin(y)])
       solver=rootfinder("solver", Solver, f, options)
-      refsol = Function("refsol", [y,x], [sin(x)])
+      refsol = Function("refsol", [y,x], [sin(x)], {"ad_weight":0, "ad_weight_sp":0})
       self.checkfunction(solver,refsol,inputs=[0,n],digits=6,sens_der=False,failmessage=message)
 
   def test_scalar2_indirect(self):
@@ -147,7 +139,7 @@ class ImplicitFunctiontests(casadiTestCase):
       R = solver(MX(),X)
 
       trial = Function("trial", [X], [R])
-      refsol = Function("refsol", [x],[sin(x)])
+      refsol = Function("refsol", [x],[sin(x)], {"ad_weight":0, "ad_weight_sp":0})
       self.checkfunction(trial,refsol,inputs=[n],digits=6,sens_der=False,failmessage=message)
 
   def test_large(self):
@@ -163,25 +155,28 @@ class ImplicitFunctiontests(casadiTestCase):
       y=SX.sym("y",s)
       y0 = DM(Sparsity.diag(N),0.1)
 
-      f=Function("f", [y.nz[:],x.nz[:]],[((mtimes((x+y0),(x+y0).T)-mtimes((y+y0),(y+y0).T))[s]).nz[:]])
-      options2 = dict(options)
-      options2["constraints"] = [1]*s.nnz()
+      u = x+y0
+      v = y+y0
+      f=Function("f", [y.nz[:],x.nz[:]],[((mtimes(u,u.T)-mtimes(v,v.T))[s]).nz[:]])
+      options2 = dict(options, constraints=numpy.ones(s.nnz(),dtype=numpy.int32), ad_weight_sp=0)
       solver=rootfinder("options2", Solver, f, options2)
 
       X = MX.sym("X",x.sparsity())
-      R = solver(MX(),X.nz[:])
+      X_nz = X.nz[:]
+      R = solver(MX(),X_nz)
 
       trial = Function("trial", [X],[R])
       trial_in = DM(trial.sparsity_in(0),[abs(cos(i)) for i in range(x.nnz())])
+      trial_in_nz = trial_in.nz[:]
       trial_out = trial(trial_in)
 
-      f_in = [trial_out, trial_in.nz[:]]
+      f_in = [trial_out, trial_in_nz]
       f_out = f(*f_in)
 
-      f_in = [trial_in.nz[:], trial_in.nz[:]]
+      f_in = [trial_in_nz, trial_in_nz]
       f_out = f(*f_in)
 
-      refsol = Function("refsol", [X],[X.nz[:]])
+      refsol = Function("refsol", [X],[X_nz]).expand("refsol", {"ad_weight":0, "ad_weight_sp":0})
       refsol_in = [0]*refsol.n_in();refsol_in[0]=trial_in[0]
 
       self.checkfunction(trial,refsol,inputs=refsol_in,digits=6,sens_der=False,evals=1,failmessage=message)
@@ -200,35 +195,32 @@ class ImplicitFunctiontests(casadiTestCase):
       f=Function("f", [y,x],[vertcat(x-arcsin(yy[0]),yy[1]**2-yy[0])])
       solver=rootfinder("solver", Solver, f, options)
 
-      refsol = Function("refsol", [y,x],[vertcat(sin(x),sqrt(sin(x)))-y0]) # ,sin(x)**2])
+      refsol = Function("refsol", [y,x],[vertcat(sin(x),sqrt(sin(x)))-y0], {"ad_weight":0, "ad_weight_sp":0}) # ,sin(x)**2])
       self.checkfunction(solver,refsol,inputs=[n,0],digits=4,sens_der=False,failmessage=message)
 
   def testKINSol1c(self):
     self.message("Scalar KINSol problem, n=0, constraint")
     x=SX.sym("x")
     f=Function("f", [x],[sin(x)])
-    solver=rootfinder("solver", "kinsol", f, {"constraints":[-1]})
+    solver=rootfinder("solver", "kinsol", f, {"constraints":numpy.array([-1],dtype=numpy.int32)})
     solver_out = solver(-6)
     self.assertAlmostEqual(solver_out[0],-2*pi,5)
 
   def test_constraints(self):
+    x=SX.sym("x",2)
+    f=Function("f", [x],[vertcat(mtimes((x+3).T,(x-2)),mtimes((x-4).T,(x+vertcat(1,2))))])
     for Solver, options, features in solvers:
       if 'kinsol' in str(Solver): continue
       if 'newton' in str(Solver): continue
 
       print(Solver, options)
-      x=SX.sym("x",2)
-      f=Function("f", [x],[vertcat(*[mtimes((x+3).T,(x-2)),mtimes((x-4).T,(x+vertcat(*[1,2])))])])
-      options2 = dict(options)
-      options2["constraints"] = [-1,0]
+      options2 = dict(options, constraints=numpy.array([-1,0],dtype=numpy.int32))
       solver=rootfinder("solver", Solver, f, options2)
       solver_out = solver(0)
 
       self.checkarray(solver_out,DM([-3.0/50*(sqrt(1201)-1),2.0/25*(sqrt(1201)-1)]),digits=6)
 
-      f=Function("f", [x],[vertcat(*[mtimes((x+3).T,(x-2)),mtimes((x-4).T,(x+vertcat(*[1,2])))])])
-      options2 = dict(options)
-      options2["constraints"] = [1,0]
+      options2 = dict(options, constraints=numpy.array([1,0],dtype=numpy.int32))
       solver=rootfinder("solver", Solver, f, options2)
       solver_out = solver(0)
 
@@ -239,7 +231,7 @@ class ImplicitFunctiontests(casadiTestCase):
     X0 = MX.sym("X0")
     V = MX.sym("V")
 
-    V_eq = vertcat(*[V[0]-X0])
+    V_eq = vertcat(V[0]-X0)
 
     # Root-finding function, implicitly defines V as a function of X0 and P
     vfcn = Function("vfcn", [V,X0], [V_eq], {"ad_weight":0, "ad_weight_sp":1})
@@ -250,7 +242,7 @@ class ImplicitFunctiontests(casadiTestCase):
     # Create a implicit function instance to solve the system of equations
     ifcn = rootfinder("ifcn", "newton", vfcn_sx, {"linear_solver":"csparse"})
 
-    #ifcn = Function('I', [X0],[vertcat(*[X0])])
+    #ifcn = Function('I', [X0],[vertcat(X0)])
     [V] = ifcn.call([0,X0],True)
 
     f = 1  # fails
@@ -273,8 +265,7 @@ class ImplicitFunctiontests(casadiTestCase):
     f = Function("f", [x,a],[tan(x)-a,sqrt(a)*x**2 ])
     for Solver, options, features in solvers:
       print(Solver)
-      options2 = dict(options)
-      options2["ad_weight_sp"] = 1
+      options2 = dict(options, ad_weight_sp=1)
       solver=rootfinder("solver", Solver, f, options2)
       solver_in = [0.1,0.3]
 
@@ -292,8 +283,7 @@ class ImplicitFunctiontests(casadiTestCase):
     y=SX.sym("y")
 
     for Solver, options, features in solvers:
-      opts = dict(options)
-      opts["error_on_fail"] = False
+      opts = dict(options, error_on_fail=False)
       solver = rootfinder("solver",Solver,{'x':vertcat(x,y), 'g':vertcat(sin(x)-2,sin(y)-2)},opts)
       solver(x0=0)
       self.assertFalse(solver.stats()["success"])